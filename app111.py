@@ -2,6 +2,7 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from numba import njit
 
 # --- 页面设置 ---
 st.set_page_config(page_title="温度控制系统智慧仿真", layout="wide")
@@ -28,21 +29,16 @@ with st.sidebar:
 
 # --- 核心仿真逻辑 (离散化模拟) ---
 # 为了处理纯滞后，使用离散迭代比传递函数库更容易在Web端实现
-def run_simulation(kp, ti, td, K, T, L, sp, total_time=300, dt=0.5):
-    n_steps = int(total_time / dt)
-    time = np.linspace(0, total_time, n_steps)
-
-    # 初始化数组
-    y = np.zeros(n_steps)  # 输出温度
-    u = np.zeros(n_steps)  # 控制量(阀门开度)
-    error = np.zeros(n_steps)  # 误差
-
-    # 滞后缓冲区 (Delay Buffer)
-    delay_steps = int(L / dt)
+# 执行器与积分限幅使闭环成为非线性递推，不能先算出整段 u 再一次 lfilter 出 y
+# 逐点迭代循环交给 numba 编译为机器码，cache=True 使编译结果在 Streamlit 重跑间复用
+@njit(cache=True)
+def _simulate_core(kp, ti, td, b0, a1, L_steps, sp, dt, n_steps, y, u, error):
+    # 循环不变量外提 (对象系数 b0 = (dt/T)*K, a1 = 1 - dt/T 已由对象核给出)
+    inv_ti = 1.0 / ti if ti > 0.01 else 0.0
 
     # PID 积分项和微分项初始化
-    integral = 0
-    prev_error = 0
+    integral = 0.0
+    prev_error = 0.0
 
     for i in range(1, n_steps):
         # 1. 计算当前误差
@@ -53,52 +49,96 @@ def run_simulation(kp, ti, td, K, T, L, sp, total_time=300, dt=0.5):
         integral += error[i] * dt
         derivative = (error[i] - prev_error) / dt
 
-        # 防止积分饱和(可选简单限幅)
-        if integral > 100: integral = 100
-        if integral < -100: integral = -100
+        # 防止积分饱和(可选简单限幅)，min/max 写法由 LLVM 编译为无分支的 minsd/maxsd
+        integral = min(100.0, max(-100.0, integral))
 
         # 计算控制量 u
         # 理想PID: u = Kp * (e + 1/Ti * ∫e + Td * de/dt)
-        # 简单处理：若Ti太小防除零
-        term_i = (1 / ti * integral) if ti > 0.01 else 0
+        # 简单处理：若Ti太小防除零 (inv_ti 已在循环外处理)
+        term_i = inv_ti * integral
 
         u_val = kp * (error[i] + term_i + td * derivative)
 
         # 执行器限幅 (0-100%开度)
-        u[i] = np.clip(u_val, 0, 100)
+        # u 前端补了 L_steps 个 0，第 i 步的控制量存放在 u[i + L_steps]
+        u[i + L_steps] = min(100.0, max(0.0, u_val))
 
         prev_error = error[i]
 
         # 3. 对象模型解算 (一阶惯性 + 滞后)
         # 离散化公式: y[k] = (dt/T)*K*u_delayed + (1 - dt/T)*y[k-1]
 
-        # 获取滞后后的控制量
-        idx_delayed = i - delay_steps
-        if idx_delayed < 0:
-            u_delayed = 0
-        else:
-            u_delayed = u[idx_delayed]
+        # 滞后后的控制量恰好是 u[i]，补零区对应滞后期内的 0，无需分支判断
+        u_delayed = u[i]
 
         # 一阶惯性环节迭代
-        y[i] = (dt / T) * K * u_delayed + (1 - (dt / T)) * y[i - 1]
+        y[i] = b0 * u_delayed + a1 * y[i - 1]
+
+
+# 对象部分只与 (K, T, L, 仿真时长, 步长) 有关，与 PID 参数和设定值无关，单独求出。
+# 离散 FOPDT 的脉冲响应 h[k] = (dt/T)*K*(1-dt/T)**(k-d) (k>=d，否则为 0) 是几何序列，
+# 用 (b0, a1, d) 递推表示即与 h 卷积等价，且每步只需 O(1)，无需展开成整段卷积
+def compute_plant_kernel(K, T, L, total_time, dt):
+    # dt 可能取 0.1 这类非二进制精确值，先取整再转 int，避免 6.9999 被截成 6
+    n_steps = int(round(total_time / dt))
+    time = np.linspace(0, total_time, n_steps)
+
+    # 滞后缓冲区 (Delay Buffer)
+    delay_steps = int(round(L / dt))
 
-    return time, y, u, error
+    return time, float(dt), delay_steps, float(dt / T * K), float(1.0 - dt / T)
+
+
+def apply_pid_closed_loop(kernel, kp, ti, td, sp):
+    time, dt, delay_steps, b0, a1 = kernel
+    n_steps = len(time)
+
+    # 初始化数组
+    y = np.zeros(n_steps)  # 输出温度
+    u = np.zeros(n_steps + delay_steps)  # 控制量(阀门开度)，前端补 delay_steps 个 0 作为滞后缓冲
+    error = np.zeros(n_steps)  # 误差
+
+    # 统一转为 float，避免 numba 针对 int/float 组合重复编译
+    _simulate_core(float(kp), float(ti), float(td), b0, a1, delay_steps,
+                   float(sp), dt, n_steps, y, u, error)
+
+    return time, y, u[delay_steps:], error
+
+
+def run_simulation(kp, ti, td, K, T, L, sp, total_time=None, dt=None):
+    # 步长与时长随对象动态自适应：步长取时间常数的 1%，时长覆盖约 5 倍时间常数和 6 倍滞后，
+    # 慢对象不必用细步长算满全程，快对象则得到更细的分辨率
+    if dt is None:
+        dt = float(np.clip(T / 100.0, 0.1, 1.0))
+    if total_time is None:
+        total_time = max(5.0 * T, 6.0 * L, 200.0)
+    kernel = compute_plant_kernel(K, T, L, total_time, dt)
+    return apply_pid_closed_loop(kernel, kp, ti, td, sp)
 
 
 # --- 运行仿真 ---
 time, y, u, error = run_simulation(kp, ti, td, K_process, T_process, L_delay, setpoint)
 
 # --- 绘图展示 (使用Plotly实现交互式图表) ---
+# 图表宽度有限，超过约 300 个点在视觉上已无差别；按步长抽稀后再发送到浏览器
+# (仅用于绘图，仿真结果本身保持完整分辨率)
+def _thin(x, y, n=300):
+    s = max(1, len(x) // n)
+    return x[::s], y[::s]
+
+
 # 图1：温度响应
+t_plot, y_plot = _thin(time, y)
 fig_temp = go.Figure()
-fig_temp.add_trace(go.Scatter(x=time, y=y, mode='lines', name='实际温度 PV'))
-fig_temp.add_trace(go.Scatter(x=time, y=[setpoint] * len(time), mode='lines', name='设定值 SP', line=dict(dash='dash')))
+fig_temp.add_trace(go.Scattergl(x=t_plot, y=y_plot, mode='lines', name='实际温度 PV'))
+fig_temp.add_trace(go.Scatter(x=[time[0], time[-1]], y=[setpoint, setpoint], mode='lines', name='设定值 SP', line=dict(dash='dash')))
 fig_temp.update_layout(title='温度响应曲线', xaxis_title='时间 (s)', yaxis_title='温度 (℃)', height=400)
 st.plotly_chart(fig_temp, use_container_width=True)
 
 # 图2：控制量输出
+t_plot, u_plot = _thin(time, u)
 fig_u = go.Figure()
-fig_u.add_trace(go.Scatter(x=time, y=u, mode='lines', name='阀门开度 OP', line=dict(color='orange')))
+fig_u.add_trace(go.Scattergl(x=t_plot, y=u_plot, mode='lines', name='阀门开度 OP', line=dict(color='orange')))
 fig_u.update_layout(title='控制量(阀门开度)变化', xaxis_title='时间 (s)', yaxis_title='开度 (%)', height=300)
 st.plotly_chart(fig_u, use_container_width=True)
 
@@ -2,176 +2,9 @@
 # 水箱系统建模与控制分析平台（最终功能完整版）
 # 太原理工大学 IPAC 实验室 © 2025
 # =========================================================
+# 页面代码与 waterbox.py 共用，这里只选择本页面的配置
+# （被控对象参数、ZN 临界比例法整定、根轨迹针对被控对象）
 
-import numpy as np
-import streamlit as st
-import matplotlib.pyplot as plt
-import control as ctl
+from waterbox import main
 
-# -----------------------------
-# Matplotlib 中文支持
-# -----------------------------
-plt.rcParams["font.sans-serif"] = ["SimHei"]
-plt.rcParams["axes.unicode_minus"] = False
-
-st.set_page_config(layout="wide")
-st.title("💧 水箱系统建模与控制分析平台")
-
-# =========================================================
-# 工具函数
-# =========================================================
-def safe(x):
-    return "--" if x is None else f"{x:.3f}"
-
-def performance_metrics(t, y):
-    try:
-        y_final = y[-1]
-        y_peak = np.max(y)
-        overshoot = (y_peak - y_final) / y_final * 100 if y_final != 0 else 0
-        idx = np.where(y >= 0.9 * y_final)[0]
-        rise = t[idx[0]] if len(idx) else None
-        ess = abs(1 - y_final)
-        return rise, overshoot, ess
-    except:
-        return None, None, None
-
-# =========================================================
-# 侧边栏：系统、控制器、整定
-# =========================================================
-with st.sidebar:
-    st.header("⚙️ 系统配置")
-
-    tank_type = st.radio("水箱模型", ["单水箱（一阶）", "双水箱（二阶）"])
-
-    st.header("🎛 控制算法")
-    ctrl_type = st.selectbox(
-        "控制器类型", ["经典 PID", "增量 PID", "模糊 PID"]
-    )
-
-    st.header("🔧 整定模块")
-    tune_method = st.radio(
-        "整定方式", ["手动整定", "ZN 临界比例法"]
-    )
-
-    # 默认参数
-    Kp = st.slider("Kp", 0.0, 10.0, 2.0)
-    Ki = st.slider("Ki", 0.0, 5.0, 1.0)
-    Kd = st.slider("Kd", 0.0, 5.0, 0.5)
-
-    if tune_method == "ZN 临界比例法":
-        Ku = st.slider("临界比例 Ku", 0.1, 20.0, 5.0)
-        Tu = st.slider("临界周期 Tu (s)", 0.1, 20.0, 2.0)
-
-        if st.button("一键 ZN 整定"):
-            Kp = 0.6 * Ku
-            Ki = 1.2 * Ku / Tu
-            Kd = 0.075 * Ku * Tu
-            st.success("ZN 整定完成，参数已更新")
-
-# =========================================================
-# 系统模型
-# =========================================================
-if tank_type == "单水箱（一阶）":
-    G = ctl.tf([1], [10, 1])
-else:
-    G = ctl.tf([1], [50, 15, 1])
-
-# =========================================================
-# 控制器
-# =========================================================
-if ctrl_type == "经典 PID":
-    C = ctl.tf([Kd, Kp, Ki], [1, 0])
-
-elif ctrl_type == "增量 PID":
-    # 工程离散近似
-    C = ctl.tf([Kd, Kp, Ki], [1, -1])
-
-else:  # 模糊 PID（工程简化）
-    C = ctl.tf([Kd, 0.8*Kp, 0.5*Ki], [1, 0])
-
-sys_cl = ctl.feedback(C * G, 1)
-
-# =========================================================
-# 仿真与指标
-# =========================================================
-t, y = ctl.step_response(sys_cl)
-rise, over, err = performance_metrics(t, y)
-
-zeros = ctl.zeros(sys_cl)
-poles = ctl.poles(sys_cl)
-
-# =========================================================
-# 第一行：零极点公式 & 性能指标
-# =========================================================
-c1, c2 = st.columns(2)
-
-with c1:
-    st.subheader("📐 在线零极点显示（公式）")
-    st.latex(r"G(s)=\frac{\prod (s-z_i)}{\prod (s-p_i)}")
-    st.write("零点 z：", np.round(zeros, 3))
-    st.write("极点 p：", np.round(poles, 3))
-
-with c2:
-    st.subheader("📊 性能指标")
-    st.metric("上升时间 (s)", safe(rise))
-    st.metric("超调量 (%)", safe(over))
-    st.metric("稳态误差", safe(err))
-
-# =========================================================
-# 第二行：零极点图 & 阶跃响应
-# =========================================================
-c3, c4 = st.columns(2)
-
-with c3:
-    st.subheader("📍 零极点图")
-    fig, ax = plt.subplots()
-    ctl.pzmap(sys_cl, ax=ax, grid=True)
-    st.pyplot(fig)
-
-with c4:
-    st.subheader("📈 阶跃响应")
-    fig, ax = plt.subplots()
-    ax.plot(t, y, label="系统响应")
-    ax.set_xlabel("时间 (s)")
-    ax.set_ylabel("液位")
-    ax.legend()
-    ax.grid()
-    st.pyplot(fig)
-
-# =========================================================
-# 第三行：根轨迹 & 波特图
-# =========================================================
-c5, c6 = st.columns(2)
-
-with c5:
-    st.subheader("🧭 根轨迹")
-    fig, ax = plt.subplots()
-    ctl.root_locus(G, ax=ax, grid=True)
-    st.pyplot(fig)
-
-with c6:
-    st.subheader("📐 波特图")
-    fig, ax = plt.subplots(2, 1)
-    ctl.bode_plot(sys_cl, ax=ax)
-    st.pyplot(fig)
-
-# =========================================================
-# 稳定性说明
-# =========================================================
-st.markdown("---")
-st.markdown("""
-### 🔍 系统稳定性判读说明（零极点图与根轨迹）
-
-1. 系统稳定性由 **极点（×）** 决定，零点（○）仅用于分析零极点关系  
-2. 所有极点实部 < 0 → **系统稳定**  
-3. 存在极点实部 > 0 → **系统不稳定**  
-4. 阶跃响应若持续增大或振荡，说明系统进入不稳定区
-""")
-
-# =========================================================
-# 版权
-# =========================================================
-st.markdown(
-    "<center>© 2025 太原理工大学 IPAC 实验室</center>",
-    unsafe_allow_html=True
-)
+main("wanterbox1")
@@ -2,210 +2,585 @@
 # 太原理工大学 IPAC 实验室
 # 水箱系统控制与分析教学平台 © 2025
 # ===============================================
+# 本文件同时是两个水箱页面的公共模块：直接运行即为综合实验平台，
+# wanterbox1.py 以另一套页面配置调用这里的 main()
 
 import numpy as np
 import streamlit as st
-import control
-import matplotlib
-import matplotlib.pyplot as plt
-
-# ========== 页面设置 ==========
-st.set_page_config(layout="wide")
-
-# ========== 中文显示 ==========
-matplotlib.rcParams['font.sans-serif'] = [
-    'SimHei', 'Microsoft YaHei', 'PingFang SC',
-    'Heiti SC', 'WenQuanYi Zen Hei', 'Arial Unicode MS'
-]
-matplotlib.rcParams['axes.unicode_minus'] = False
-
-# ========== 标题 ==========
-st.markdown("""
-<div style="background-color:#1976D2;padding:15px;border-radius:8px">
-<h2 style="color:white;text-align:center">
-太原理工大学 IPAC 实验室<br>
-水箱系统建模与控制综合实验平台
-</h2>
-</div>
-""", unsafe_allow_html=True)
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from numba import njit
+
+# ========== 页面配置 ==========
+# 两个页面只在被控对象参数、整定方式、根轨迹对象、侧边栏文字和版式上不同，其余代码共用
+PAGE_CONFIGS = {
+    # 综合实验平台：蓝色标题栏与淡蓝色模块，经验 / ZN 近似一键整定，根轨迹针对开环 C·G
+    "waterbox": {
+        "styled": True,
+        "plants": {
+            "单水箱（一阶）": ([1.0], [5.0, 1.0]),
+            "双水箱（二阶）": ([1.0], [10.0, 6.0, 1.0]),
+        },
+        "tuning": "preset",
+        "locus_of": "open_loop",
+        # 控制算法选择框只作展示，回路始终为经典 PID
+        "ctrl_in_loop": False,
+        "sidebar": {
+            "header": "⚙️ 参数设置",
+            "model": ("selectbox", "水箱模型选择"),
+            "ctrl_header": None,
+            "ctrl_label": "控制算法",
+            "tuning_header": ("subheader", "🤖 自动整定模块"),
+        },
+    },
+    # 建模与控制分析平台：普通标题，ZN 临界比例法整定，根轨迹只针对被控对象 G
+    "wanterbox1": {
+        "styled": False,
+        "plants": {
+            "单水箱（一阶）": ([1.0], [10.0, 1.0]),
+            "双水箱（二阶）": ([1.0], [50.0, 15.0, 1.0]),
+        },
+        "tuning": "ultimate",
+        "locus_of": "plant",
+        "ctrl_in_loop": True,
+        "sidebar": {
+            "header": "⚙️ 系统配置",
+            "model": ("radio", "水箱模型"),
+            "ctrl_header": "🎛 控制算法",
+            "ctrl_label": "控制器类型",
+            "tuning_header": ("header", "🔧 整定模块"),
+        },
+    },
+}
+
+# ========== 样式 ==========
+# 各模块共用的样式，随标题一次发送，模块中只引用类名
+PAGE_CSS = """
+<style>
+.ipac-header {background-color:#1976D2;padding:15px;border-radius:8px}
+.ipac-header h2 {color:white;text-align:center}
+.ipac-block {background-color:#E3F2FD;padding:12px;border-radius:8px;margin-bottom:10px;}
+.ipac-footer {text-align:center;color:gray}
+</style>
+"""
 
 # ========== 淡蓝色模块 ==========
-def blue_block(title):
-    st.markdown(f"""
-    <div style="background-color:#E3F2FD;
-                padding:12px;border-radius:8px;margin-bottom:10px;">
-    <h4>{title}</h4>
-    """, unsafe_allow_html=True)
-
-def end_block():
-    st.markdown("</div>", unsafe_allow_html=True)
-
-# ========== 侧边栏 ==========
-with st.sidebar:
-    st.header("⚙️ 参数设置")
-
-    model_type = st.selectbox(
-        "水箱模型选择",
-        ["单水箱（一阶）", "双水箱（二阶）"]
-    )
-
-    controller_type = st.selectbox(
-        "控制算法",
-        ["经典 PID", "增量 PID", "模糊 PID"]
-    )
-
-    # ===== 自动整定模块 =====
-    st.subheader("🤖 自动整定模块")
-
-    tune_method = st.selectbox(
-        "整定方法",
-        ["经验整定（教学版）", "Ziegler–Nichols（近似）"]
-    )
-
-    if "auto_params" not in st.session_state:
-        st.session_state.auto_params = (2.0, 1.0, 0.5)
-
-    if st.button("🚀 一键自动整定"):
-        if model_type == "单水箱（一阶）":
-            tau = 5.0
-            if tune_method == "经验整定（教学版）":
-                Kp = 1.5
-                Ki = 0.8
-                Kd = 0.3
-            else:
-                Kp = 1.2 * tau
-                Ki = Kp / (2 * tau)
-                Kd = 0.5 * tau
-        else:
-            if tune_method == "经验整定（教学版）":
-                Kp, Ki, Kd = 2.5, 1.2, 0.4
-            else:
-                Kp, Ki, Kd = 3.0, 1.5, 0.6
-
-        st.session_state.auto_params = (Kp, Ki, Kd)
-        st.success("自动整定完成，可继续手动微调")
+# 不带样式的页面用普通小标题代替
+def blue_block(title, styled=True):
+    if styled:
+        st.markdown(f'<div class="ipac-block"><h4>{title}</h4>', unsafe_allow_html=True)
+    else:
+        st.subheader(title)
+
+def end_block(styled=True):
+    if styled:
+        st.markdown("</div>", unsafe_allow_html=True)
+
+# ========== 系统模型与控制器 ==========
+# 传递函数统一用 (num, den) 多项式系数表示（降幂排列）
+CTRL_TYPES = ["经典 PID", "增量 PID", "模糊 PID"]
+
+def build_controller(ctrl_type, Kp, Ki, Kd):
+    if ctrl_type == "经典 PID":
+        return [Kd, Kp, Ki], [1.0, 0.0]
+
+    elif ctrl_type == "增量 PID":
+        # 工程离散近似
+        return [Kd, Kp, Ki], [1.0, -1.0]
+
+    else:  # 模糊 PID（工程简化）
+        return [Kd, 0.8*Kp, 0.5*Ki], [1.0, 0.0]
+
+def my_feedback(num_ol, den_ol):
+    # 单位负反馈：开环 N/D → 闭环 N/(D+N)，返回闭环分母 D+N（分子不变）。
+    # 两者按低次项对齐相加；num_ol 可为每行一组分子的二维数组
+    n, d = num_ol.shape[-1], den_ol.shape[-1]
+    den_cl = np.zeros(num_ol.shape[:-1] + (max(n, d),))
+    den_cl[..., -d:] += den_ol
+    den_cl[..., -n:] += num_ol
+    return den_cl
+
+# 每种 (页面, 模型, 控制器) 的开环分子系数矩阵 B（num_ol = B @ [Kp, Ki, Kd]）与开环分母
+# （多项式相乘即系数卷积）
+def _loop_basis(page, model_type, ctrl_type):
+    num_p, den_p = PAGE_CONFIGS[page]["plants"][model_type]
+    B = np.column_stack([np.convolve(build_controller(ctrl_type, *e)[0], num_p) for e in np.eye(3)])
+    den_ol = np.convolve(build_controller(ctrl_type, 0.0, 0.0, 0.0)[1], den_p)
+    # 各处共用同一份系数，设为只读
+    B.flags.writeable = den_ol.flags.writeable = False
+    return B, den_ol
+
+LOOP_BASIS = {
+    (page, model_type, ctrl_type): _loop_basis(page, model_type, ctrl_type)
+    for page, cfg in PAGE_CONFIGS.items()
+    for model_type in cfg["plants"]
+    for ctrl_type in CTRL_TYPES
+}
+
+# 返回开环分子、开环分母与闭环分母；闭环分子即开环分子
+def loop_polys(page, model_type, ctrl_type, Kp, Ki, Kd):
+    B, den_ol = LOOP_BASIS[(page, model_type, ctrl_type)]
+    num_ol = B @ np.array([Kp, Ki, Kd], dtype=float)
+    return num_ol, den_ol, my_feedback(num_ol, den_ol)
+
+# 根轨迹分支配对：每个根取与上一组对应根最近、且尚未被占用的根
+@njit(cache=True)
+def _match_branches(roots):
+    g, n = roots.shape
+    rlist = np.empty_like(roots)
+    rlist[0] = roots[0]
+    used = np.zeros(n, dtype=np.bool_)
+    for i in range(1, g):
+        used[:] = False
+        for j in range(n):
+            best = -1
+            best_d = np.inf
+            for k in range(n):
+                if not used[k]:
+                    d = abs(roots[i, k] - rlist[i - 1, j])
+                    if best < 0 or d < best_d:
+                        best = k
+                        best_d = d
+            used[best] = True
+            rlist[i, j] = roots[i, best]
+    return rlist
+
+# 伴随矩阵：polys 每行一个多项式（降幂、首项非零），所有行由 LAPACK 批量求根
+def companion_roots(polys):
+    n = polys.shape[1] - 1
+    comp = np.zeros((len(polys), n, n))
+    comp[:, 0, :] = -polys[:, 1:] / polys[:, :1]
+    comp[:, 1:, :-1] = np.eye(n - 1)
+    return np.linalg.eigvals(comp)
+
+# 留数公式不适用的极点组：有原点极点或重极点（相对最大极点模长判断）；
+# poles 最后一维为一组极点，前面各维逐组判断
+def residue_unsafe(poles):
+    scale = np.maximum(1.0, np.abs(poles).max(axis=-1))
+    gap = np.abs(poles[..., :, None] - poles[..., None, :])
+    idx = np.arange(poles.shape[-1])
+    gap[..., idx, idx] = np.inf
+    return (np.abs(poles).min(axis=-1) < 1e-8 * scale) | (gap.min(axis=(-2, -1)) < 1e-4 * scale)
+
+def root_locus_polys(num, den, gains):
+    # 对每个增益 k 求 den + k*num 的根；按与上一组根的距离贪心配对，保证各分支连续
+    num = np.concatenate((np.zeros(len(den) - len(num)), num))
+    polys = den[None, :] + gains[:, None] * num[None, :]
+    return _match_branches(companion_roots(polys).astype(np.complex128))
+
+def sstep(system, T):
+    # scipy.signal 只在解析解不适用的退化情形使用，按需导入
+    from scipy.signal import step
+    return step(system, T=T)
+
+def analytic_step(num, den, t, poles=None):
+    # 闭环阶跃响应的部分分式解析解：Y(s) = N(s) / (s·D(s))，极点均为单极点时
+    # y(t) = N(0)/D(0) + Σ N(p_i) / (p_i·D'(p_i)) · exp(p_i·t)，整段只需一次矩阵乘法；
+    # 有重极点、原点极点时留数公式失效（或严重抵消），退回 scipy 的通用解法
+    num = np.trim_zeros(np.asarray(num, dtype=float), "f")
+    den = np.trim_zeros(np.asarray(den, dtype=float), "f")
+    # poles 可由调用方传入已求出的闭环极点
+    if poles is None:
+        poles = np.roots(den)
+    n = len(poles)
+    if n == 0 or len(num) == 0:
+        return sstep((num if len(num) else [0.0], den), T=t)
+    if residue_unsafe(poles):
+        return sstep((num, den), T=t)
+    res = np.polyval(num, poles) / (poles * np.polyval(np.polyder(den), poles))
+    y = num[-1] / den[-1] + (np.exp(np.outer(t, poles)) @ res).real
+    return t, y
+
+def batch_step(nums, dens, t):
+    # analytic_step 的批量版本：nums/dens 每行一组闭环多项式（分子不宽于分母）；
+    # 重极点或原点极点的行置为 NaN，极点一并返回
+    n = dens.shape[1] - 1
+    poles = companion_roots(dens)
+
+    # Horner 法逐系数求 N(p) 与 D'(p)
+    d_der = dens[:, :-1] * np.arange(n, 0, -1)
+    Np = np.zeros_like(poles)
+    for k in range(nums.shape[1]):
+        Np = Np * poles + nums[:, k:k + 1]
+    Dp = np.zeros_like(poles)
+    for k in range(n):
+        Dp = Dp * poles + d_der[:, k:k + 1]
+
+    with np.errstate(all="ignore"):
+        res = Np / (poles * Dp)
+        y = nums[:, -1:] / dens[:, -1:] + np.einsum(
+            "ij,ijk->ik", res, np.exp(poles[:, :, None] * t[None, None, :])).real
+
+    y[residue_unsafe(poles)] = np.nan
+    return y, poles
+
+# 频率响应 H(jω)：Horner 法求分子、分母多项式在各 jω 处的值
+@njit(cache=True, fastmath=True)
+def freq_response(num, den, w):
+    H = np.empty(w.shape[0], dtype=np.complex128)
+    for i in range(w.shape[0]):
+        s = 1j * w[i]
+        n = 0j
+        for c in num:
+            n = n * s + c
+        d = 0j
+        for c in den:
+            d = d * s + c
+        H[i] = n / d
+    return H
+
+# 各缓存计算共用的固定网格；STEP_T 为阶跃响应的最长时间网格
+# 时间 300 点、频率 200 点，频率上限 100 rad/s
+STEP_T = np.linspace(0, 100, 300)
+RL_GAINS = np.logspace(-2, 2, 200)
+BODE_OMEGA = np.logspace(-2, 2, 200)
+
+# 阶跃响应时间网格：约 5 倍最慢闭环时间常数，不稳定或临界稳定时取完整的 STEP_T
+def step_grid(poles):
+    decay = -np.real(poles)
+    if len(decay) == 0 or decay.min() <= 0:
+        return STEP_T
+    t_end = min(STEP_T[-1], max(10.0, 5.0 / decay.min()))
+    return np.linspace(0, t_end, int(np.clip(t_end * 10, 150, len(STEP_T))))
+
+# ========== 缓存计算 ==========
+# 以页面名、模型名、控制器与 PID 标量为键缓存；滑块取值连续，每个函数最多保留 64 组
+@st.cache_data(max_entries=64, show_spinner=False)
+def _step(page, model_type, ctrl_type, Kp, Ki, Kd):
+    num_cl, _, den_cl = loop_polys(page, model_type, ctrl_type, Kp, Ki, Kd)
+    _, poles = _zpk(page, model_type, ctrl_type, Kp, Ki, Kd)
+    t, y = analytic_step(num_cl, den_cl, step_grid(poles), poles)
+    # 稳定时终值即直流增益 N(0)/D(0)；不稳定时没有终值，沿用曲线末点
+    if np.all(np.real(poles) < 0):
+        y_final = num_cl[-1] / den_cl[-1]
+    else:
+        y_final = y[-1]
+    return t, y, y_final
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _root_locus(page, model_type, ctrl_type, Kp, Ki, Kd):
+    # 根轨迹的对象由页面配置决定：开环 C·G，或只看被控对象 G（与控制器参数无关）
+    if PAGE_CONFIGS[page]["locus_of"] == "plant":
+        num, den = map(np.asarray, PAGE_CONFIGS[page]["plants"][model_type])
+    else:
+        num, den, _ = loop_polys(page, model_type, ctrl_type, Kp, Ki, Kd)
+    rlist = root_locus_polys(num, den, RL_GAINS)
+    # 各分支以 NaN 隔开连成一条曲线
+    branches = np.vstack((rlist, np.full((1, rlist.shape[1]), complex(np.nan, np.nan)))).T.ravel()
+    # 同时返回根轨迹起点、终点标记用的零极点
+    return branches, np.roots(num), np.roots(den)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _bode(page, model_type, ctrl_type, Kp, Ki, Kd):
+    num_cl, _, den_cl = loop_polys(page, model_type, ctrl_type, Kp, Ki, Kd)
+    # 直接在 jω 网格上对分子、分母多项式求值，幅值单位为 dB，相位单位为度
+    H = freq_response(num_cl, den_cl, BODE_OMEGA)
+    mag = 20 * np.log10(np.abs(H))
+    phase = np.degrees(np.unwrap(np.angle(H)))
+    return BODE_OMEGA, mag, phase
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _zpk(page, model_type, ctrl_type, Kp, Ki, Kd):
+    num_cl, _, den_cl = loop_polys(page, model_type, ctrl_type, Kp, Ki, Kd)
+    return np.roots(num_cl), np.roots(den_cl)
+
+# Kp × Ki 参数扫描（Kd 取当前值）：所有组合的闭环一次性批量求阶跃响应与指标
+SWEEP_KP = np.linspace(0.5, 10.0, 20)
+SWEEP_KI = np.linspace(0.25, 5.0, 20)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _gain_sweep(page, model_type, ctrl_type, Kd):
+    gains = np.stack(np.meshgrid(SWEEP_KP, SWEEP_KI, [Kd], indexing="xy"), -1).reshape(-1, 3)
+    # 由系数矩阵一次算出全部闭环多项式
+    B, den_ol = LOOP_BASIS[(page, model_type, ctrl_type)]
+    nums = gains @ B.T
+    dens = my_feedback(nums, den_ol)
+    y, poles = batch_step(nums, dens, STEP_T)
+
+    with np.errstate(all="ignore"):
+        # 不稳定的组合不给出指标；终值取直流增益
+        unstable = ~np.isfinite(y).all(axis=1) | (poles.real >= 0).any(axis=1)
+        y_final = nums[:, -1] / dens[:, -1]
+        overshoot = (y.max(axis=1) - y_final) / y_final * 100
+        reached = y >= 0.9 * y_final[:, None]
+        rise = np.where(reached.any(axis=1), STEP_T[reached.argmax(axis=1)], np.nan)
+    overshoot[unstable] = np.nan
+    rise[unstable] = np.nan
+    shape = (len(SWEEP_KI), len(SWEEP_KP))
+    return overshoot.reshape(shape), rise.reshape(shape)
+
+# ========== 性能指标工具 ==========
+# 一次遍历求峰值和首次到达 90% 终值 y_final 的时刻；无法计算的指标返回 NaN
+@njit(cache=True)
+def step_metrics(t, y, y_final):
+    if y_final == 0:
+        return np.nan, np.nan, abs(1 - y_final)
+    thr = 0.9 * y_final
+    y_peak = y[0]
+    rise_time = np.nan
+    for i in range(y.shape[0]):
+        v = y[i]
+        if v > y_peak:
+            y_peak = v
+        if np.isnan(rise_time) and v >= thr:
+            rise_time = t[i]
+    return rise_time, (y_peak - y_final) / y_final * 100, abs(1 - y_final)
+
+# 复数数组的实部、虚部（view 成 float64 两列）；实数组虚部补零
+def re_im(z):
+    if np.iscomplexobj(z):
+        ri = np.ascontiguousarray(z).view(np.float64).reshape(-1, 2)
+        return ri[:, 0], ri[:, 1]
+    return z, np.zeros_like(z)
 
+def show(x):
+    return "--" if x is None or np.isnan(x) else round(float(x), 4)
+
+# ========== 整定 ==========
+# 一键整定的结果只取决于 (模型, 整定方法)，预先算成常数表直接查；
+# 单水箱 ZN 近似按 τ = 5 s：Kp = 1.2τ, Ki = Kp / 2τ, Kd = 0.5τ
+PRESET_TUNING = {
+    ("单水箱（一阶）", "经验整定（教学版）"): (1.5, 0.8, 0.3),
+    ("单水箱（一阶）", "Ziegler–Nichols（近似）"): (6.0, 0.6, 2.5),
+    ("双水箱（二阶）", "经验整定（教学版）"): (2.5, 1.2, 0.4),
+    ("双水箱（二阶）", "Ziegler–Nichols（近似）"): (3.0, 1.5, 0.6),
+}
+
+# PID 滑块的取值范围 (Kp, Ki, Kd)
+PID_LIMITS = ((0.0, 10.0), (0.0, 5.0), (0.0, 5.0))
+
+# ZN 临界比例法整定公式，结果限制在滑块范围内
+def zn_tuning(Ku, Tu):
+    gains = (0.6 * Ku, 1.2 * Ku / Tu, 0.075 * Ku * Tu)
+    return tuple(min(hi, max(lo, g)) for g, (lo, hi) in zip(gains, PID_LIMITS))
+
+def tuning_sidebar(cfg, model_type):
+    kind, text = cfg["sidebar"]["tuning_header"]
+    getattr(st, kind)(text)
+
+    if cfg["tuning"] == "preset":
+        tune_method = st.selectbox(
+            "整定方法",
+            ["经验整定（教学版）", "Ziegler–Nichols（近似）"]
+        )
+        if st.button("🚀 一键自动整定"):
+            st.session_state.auto_params = PRESET_TUNING[(model_type, tune_method)]
+            st.success("自动整定完成，可继续手动微调")
+        return
+
+    tune_method = st.radio("整定方式", ["手动整定", "ZN 临界比例法"])
+    if tune_method == "ZN 临界比例法":
+        Ku = st.slider("临界比例 Ku", 0.1, 20.0, 5.0)
+        Tu = st.slider("临界周期 Tu (s)", 0.1, 20.0, 2.0)
+
+        if st.button("一键 ZN 整定"):
+            st.session_state.auto_params = zn_tuning(Ku, Tu)
+            st.success("ZN 整定完成，参数已更新")
+
+# ========== 图表骨架 ==========
+# 各图在会话中只构造一次，重跑时只替换各 trace 的 x / y 数据；曲线用 Scattergl，零极点标记用 Scatter
+MARGIN = dict(l=10, r=10, t=10, b=10)
+
+def session_fig(key, build):
+    if key not in st.session_state:
+        st.session_state[key] = build()
+    return st.session_state[key]
+
+def _pz_markers(fig, pole_name, zero_name, row, col):
+    fig.add_trace(go.Scatter(mode='markers', name=pole_name,
+                             marker=dict(symbol='x', color='red', size=12)), row=row, col=col)
+    fig.add_trace(go.Scatter(mode='markers', name=zero_name,
+                             marker=dict(symbol='circle-open', color='blue', size=12)), row=row, col=col)
+
+# 零极点图、阶跃响应、根轨迹、波特图合成的子图网格，分析面板按 trace 下标更新：
+#   0/1 零极点图的极点/零点，2 阶跃响应，3 根轨迹，4/5 开环极点/零点，6 幅频，7 相频
+def build_grid_fig():
+    fig = make_subplots(
+        rows=3, cols=2,
+        specs=[[{}, {}], [{"rowspan": 2}, {}], [None, {}]],
+        subplot_titles=("零极点图", "阶跃响应", "根轨迹", "波特图", ""),
+        vertical_spacing=0.08, horizontal_spacing=0.08)
+
+    _pz_markers(fig, '极点', '零点', 1, 1)
+    fig.add_hline(y=0, line_color='gray', line_width=0.8, row=1, col=1)
+    fig.add_vline(x=0, line_color='gray', line_width=0.8, row=1, col=1)
+    fig.update_xaxes(title_text='实轴', row=1, col=1)
+    fig.update_yaxes(title_text='虚轴', row=1, col=1)
+
+    fig.add_trace(go.Scattergl(mode='lines', name='阶跃响应'), row=1, col=2)
+    fig.update_xaxes(title_text='时间 (s)', row=1, col=2)
+    fig.update_yaxes(title_text='液位', row=1, col=2)
+
+    # 根轨迹各分支已用 NaN 连成一条曲线，用 WebGL 的 Scattergl 一次绘制
+    fig.add_trace(go.Scattergl(mode='lines', line=dict(color='green'), name='根轨迹'), row=2, col=1)
+    _pz_markers(fig, '开环极点', '开环零点', 2, 1)
+    fig.update_xaxes(title_text='实轴', row=2, col=1)
+    fig.update_yaxes(title_text='虚轴', row=2, col=1)
+
+    # 幅频、相频上下两格共用对数频率轴（相频格的 x 轴跟随幅频格缩放）
+    fig.add_trace(go.Scattergl(mode='lines', name='幅值'), row=2, col=2)
+    fig.add_trace(go.Scattergl(mode='lines', name='相位'), row=3, col=2)
+    fig.update_xaxes(type='log', row=2, col=2)
+    fig.update_xaxes(type='log', matches='x4', title_text='频率 (rad/s)', row=3, col=2)
+    fig.update_yaxes(title_text='幅值 (dB)', row=2, col=2)
+    fig.update_yaxes(title_text='相位 (°)', row=3, col=2)
+
+    fig.update_layout(height=900, showlegend=False, margin=dict(MARGIN, t=30))
+    return fig
+
+def build_sweep_fig():
+    fig = go.Figure(go.Heatmap(x=SWEEP_KP, y=SWEEP_KI,
+                               colorscale='Viridis', colorbar=dict(title='%')))
+    fig.add_trace(go.Scatter(mode='markers', name='当前参数',
+                             marker=dict(symbol='x', color='red', size=12)))
+    fig.update_layout(xaxis_title='Kp', yaxis_title='Ki', height=360, margin=MARGIN)
+    return fig
+
+# ========== 分析面板（局部重跑） ==========
+# PID 滑块与依赖它的各图放在同一个 fragment 中：提交 PID 参数只重跑本函数，
+# 页眉、侧边栏、稳定性说明等静态部分不随之重跑
+@st.fragment
+def analysis_panel(page, model_type, ctrl_type):
+    styled = PAGE_CONFIGS[page]["styled"]
     st.subheader("🎯 PID 参数（可手动微调）")
 
     Kp, Ki, Kd = st.session_state.auto_params
 
-    Kp = st.slider("Kp", 0.0, 10.0, Kp)
-    Ki = st.slider("Ki", 0.0, 5.0, Ki)
-    Kd = st.slider("Kd", 0.0, 5.0, Kd)
+    # 滑块放在表单中，拖动过程中不触发重跑，点击"应用"后才一次性提交三个参数
+    with st.form("pid_form"):
+        s1, s2, s3 = st.columns(3)
+        Kp = s1.slider("Kp", *PID_LIMITS[0], Kp)
+        Ki = s2.slider("Ki", *PID_LIMITS[1], Ki)
+        Kd = s3.slider("Kd", *PID_LIMITS[2], Kd)
+        st.form_submit_button("应用")
 
     st.session_state.auto_params = (Kp, Ki, Kd)
+    key = (page, model_type, ctrl_type, Kp, Ki, Kd)
+
+    # 闭环零点/极点一次求出，后续各处复用
+    zeros, poles = _zpk(*key)
+
+    # ---------- 响应与性能 ----------
+    t, y, y_final = _step(*key)
+    rise_time, overshoot, steady_error = step_metrics(t, y, y_final)
+
+    # ---------- 第一排 ----------
+    c1, c2 = st.columns(2)
+
+    with c1:
+        blue_block("零极点公式显示", styled)
+        st.latex(r"G(s)=\frac{\prod (s-z_i)}{\prod (s-p_i)}")
+        st.write("零点：", np.round(zeros, 3))
+        st.write("极点：", np.round(poles, 3))
+        end_block(styled)
+
+    with c2:
+        blue_block("性能指标", styled)
+        st.metric("上升时间 (s)", show(rise_time))
+        st.metric("超调量 (%)", show(overshoot))
+        st.metric("稳态误差", show(steady_error))
+        end_block(styled)
+
+    # ---------- 图表 ----------
+    branches, zeros_rl, poles_rl = _root_locus(*key)
+    omega, mag, phase = _bode(*key)
+
+    blue_block("系统图表", styled)
+    fig = session_fig("fig_grid", build_grid_fig)
+    x, y_im = re_im(poles)
+    fig.data[0].update(x=x, y=y_im)
+    x, y_im = re_im(zeros)
+    fig.data[1].update(x=x, y=y_im)
+    fig.data[2].update(x=t, y=y)
+    fig.data[3].update(x=branches.real, y=branches.imag)
+    x, y_im = re_im(poles_rl)
+    fig.data[4].update(x=x, y=y_im)
+    x, y_im = re_im(zeros_rl)
+    fig.data[5].update(x=x, y=y_im)
+    fig.data[6].update(x=omega, y=mag)
+    fig.data[7].update(x=omega, y=phase)
+    st.plotly_chart(fig, use_container_width=True)
+    end_block(styled)
+
+    # ---------- 参数扫描 ----------
+    if st.checkbox("显示 Kp × Ki 参数扫描（Kd 取当前值）"):
+        blue_block("参数扫描：超调量 (%)", styled)
+        overshoot_map, _ = _gain_sweep(page, model_type, ctrl_type, Kd)
+        fig = session_fig("fig_sweep", build_sweep_fig)
+        fig.data[0].update(z=overshoot_map)
+        fig.data[1].update(x=[Kp], y=[Ki])
+        st.plotly_chart(fig, use_container_width=True)
+        end_block(styled)
+
+# ========== 页面 ==========
+def main(page):
+    cfg = PAGE_CONFIGS[page]
+    styled = cfg["styled"]
+
+    st.set_page_config(layout="wide")
+
+    # ---------- 标题 ----------
+    if styled:
+        st.markdown(PAGE_CSS + """
+<div class="ipac-header">
+<h2>
+太原理工大学 IPAC 实验室<br>
+水箱系统建模与控制综合实验平台
+</h2>
+</div>
+""", unsafe_allow_html=True)
+    else:
+        st.title("💧 水箱系统建模与控制分析平台")
 
-# ========== 系统模型 ==========
-if model_type == "单水箱（一阶）":
-    G = control.tf([1], [5, 1])
-else:
-    G = control.tf([1], [10, 6, 1])
+    # ---------- 侧边栏 ----------
+    sb = cfg["sidebar"]
+    with st.sidebar:
+        st.header(sb["header"])
 
-# ========== 控制器 ==========
-C = control.tf([Kd, Kp, Ki], [1, 0])
-sys = control.feedback(C * G, 1)
+        widget, label = sb["model"]
+        model_type = getattr(st, widget)(label, list(cfg["plants"]))
 
-# ========== 响应与性能 ==========
-t, y = control.step_response(sys)
-y_final = y[-1]
+        if sb["ctrl_header"]:
+            st.header(sb["ctrl_header"])
+        ctrl_type = st.selectbox(sb["ctrl_label"], CTRL_TYPES)
+        if not cfg["ctrl_in_loop"]:
+            ctrl_type = CTRL_TYPES[0]
 
-rise_time = (
-    t[np.where(y >= 0.9 * y_final)[0][0]]
-    if y_final != 0 and np.any(y >= 0.9 * y_final)
-    else None
-)
+        if "auto_params" not in st.session_state:
+            st.session_state.auto_params = (2.0, 1.0, 0.5)
 
-overshoot = (
-    (np.max(y) - y_final) / y_final * 100
-    if y_final != 0 else None
-)
+        tuning_sidebar(cfg, model_type)
 
-steady_error = abs(1 - y_final)
+    analysis_panel(page, model_type, ctrl_type)
 
-def show(x):
-    return "--" if x is None else round(float(x), 4)
-
-# ========== 第一排 ==========
-c1, c2 = st.columns(2)
-
-with c1:
-    blue_block("零极点公式显示")
-    st.latex(r"G(s)=\frac{\prod (s-z_i)}{\prod (s-p_i)}")
-    st.write("零点：", control.zeros(sys))
-    st.write("极点：", control.poles(sys))
-    end_block()
-
-with c2:
-    blue_block("性能指标")
-    st.metric("上升时间 (s)", show(rise_time))
-    st.metric("超调量 (%)", show(overshoot))
-    st.metric("稳态误差", show(steady_error))
-    end_block()
-
-# ========== 第二排 ==========
-c3, c4 = st.columns(2)
-
-with c3:
-    blue_block("零极点图")
-    poles = control.poles(sys)
-    zeros = control.zeros(sys)
-    fig, ax = plt.subplots()
-    ax.scatter(poles.real, poles.imag, color='red', marker='x', s=80, label='极点')
-    ax.scatter(zeros.real, zeros.imag,
-               facecolors='none', edgecolors='blue',
-               s=80, label='零点')
-    ax.axhline(0); ax.axvline(0)
-    ax.set_xlabel("实轴")
-    ax.set_ylabel("虚轴")
-    ax.legend()
-    ax.grid(True)
-    st.pyplot(fig)
-    end_block()
-
-with c4:
-    blue_block("阶跃响应")
-    fig, ax = plt.subplots()
-    ax.plot(t, y, label="阶跃响应")
-    ax.set_xlabel("时间 (s)")
-    ax.set_ylabel("输出")
-    ax.legend()
-    ax.grid(True)
-    st.pyplot(fig)
-    end_block()
-
-# ========== 第三排 ==========
-c5, c6 = st.columns(2)
-
-with c5:
-    blue_block("根轨迹")
-    fig, ax = plt.subplots()
-    control.root_locus(C * G, ax=ax, grid=True)
-    ax.set_xlabel("实轴")
-    ax.set_ylabel("虚轴")
-    st.pyplot(fig)
-    end_block()
-
-with c6:
-    blue_block("波特图")
-    fig, ax = plt.subplots(2, 1)
-    control.bode(sys, ax=ax)
-    st.pyplot(fig)
-    end_block()
-
-# ========== 稳定性说明 ==========
-blue_block("🔍 系统稳定性判读说明（零极点图与根轨迹）")
-st.markdown("""
+    # ---------- 稳定性说明 ----------
+    if styled:
+        blue_block("🔍 系统稳定性判读说明（零极点图与根轨迹）")
+    else:
+        st.markdown("---")
+        st.markdown("### 🔍 系统稳定性判读说明（零极点图与根轨迹）")
+    st.markdown("""
 1. 系统稳定性由 **极点（×）** 决定，零点（○）仅用于结构分析  
 2. 所有极点实部 < 0 → **系统稳定**  
 3. 存在极点实部 > 0 → **系统不稳定**  
 4. 阶跃响应持续振荡或发散 → 系统进入不稳定区  
 """)
-end_block()
+    end_block(styled)
 
-# ========== 版权 ==========
-st.markdown("""
+    # ---------- 版权 ----------
+    if styled:
+        st.markdown("""
 <hr>
-<div style="text-align:center;color:gray">
+<div class="ipac-footer">
 © 2025 太原理工大学 IPAC 实验室
 </div>
 """, unsafe_allow_html=True)
+    else:
+        st.markdown(
+            "<center>© 2025 太原理工大学 IPAC 实验室</center>",
+            unsafe_allow_html=True
+        )
+
+
+if __name__ == "__main__":
+    main("waterbox")